@@ -0,0 +1,25 @@
+import pytest
+
+from tools._amadeus import convert_country_to_code
+
+
+@pytest.mark.parametrize(
+    "country_name, country_code",
+    [
+        ("Turkey", "TR"),
+        ("Ivory Coast", "CI"),
+        ("Korea", "KR"),
+        ("Great Britain", "GB"),
+        ("  united kingdom ", "GB"),
+        ("Türkiye", "TR"),
+        ("Côte d'Ivoire", "CI"),
+        ("Italy", "IT"),
+    ],
+)
+def test_convert_country_to_code(country_name, country_code):
+    assert convert_country_to_code(country_name) == country_code
+
+
+def test_convert_country_to_code_rejects_unknown_countries():
+    with pytest.raises(ValueError):
+        convert_country_to_code("Narnia")
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from aiohttp import web
+
+from tools._http import run
+from tools.search_hotel_tool import AmadeusHotelFinderTool
+
+
+@pytest.fixture
+def hotel_tool(monkeypatch):
+    monkeypatch.setenv("AMADEUS_API_KEY", "key")
+    monkeypatch.setenv("AMADEUS_API_SECRET", "secret")
+    return AmadeusHotelFinderTool()
+
+
+@pytest.fixture
+def serve_offers():
+    """Serves the hotel-offers endpoint with the given handler and returns its base URL."""
+    runners = []
+
+    def serve(handler) -> str:
+        app = web.Application()
+        app.router.add_get("/v3/shopping/hotel-offers", handler)
+        runner = web.AppRunner(app)
+        run(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        run(site.start())
+        runners.append(runner)
+        return f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    yield serve
+
+    for runner in runners:
+        run(runner.cleanup())
+
+
+def fetch_offers(hotel_tool, hotel_ids):
+    return run(
+        hotel_tool.fetch_hotel_offers(
+            hotel_ids, "2025-03-15", "2025-03-16", 1, None, "USD", "token"
+        )
+    )
+
+
+def test_error_response_with_empty_body_skips_the_batch(hotel_tool, serve_offers):
+    async def handler(request):
+        if "FAIL" in request.query["hotelIds"]:
+            return web.Response(status=400)
+        return web.json_response(
+            {
+                "data": [
+                    {
+                        "hotel": {"name": "Good Hotel"},
+                        "offers": [{"price": {"total": "100.00"}}],
+                    }
+                ]
+            }
+        )
+
+    hotel_tool.base_url = serve_offers(handler)
+    hotel_ids = ["FAIL"] * 20 + ["OK"]
+
+    offers = json.loads(fetch_offers(hotel_tool, hotel_ids))
+
+    assert [offer["Hotel Name"] for offer in offers] == ["Good Hotel"]
+
+
+def test_hotels_without_offers_are_skipped(hotel_tool, serve_offers):
+    async def handler(request):
+        return web.json_response(
+            {
+                "data": [
+                    {"hotel": {"name": "Full Hotel"}, "offers": []},
+                    {"hotel": {"name": "Unknown Offers Hotel"}},
+                    {
+                        "hotel": {"name": "Hôtel Lumière"},
+                        "offers": [{"price": {"total": "100.00"}}],
+                    },
+                ]
+            }
+        )
+
+    hotel_tool.base_url = serve_offers(handler)
+
+    response = fetch_offers(hotel_tool, ["A", "B", "C"])
+    offers = json.loads(response)
+
+    # Names are returned as UTF-8, not as \u escapes
+    assert "Hôtel Lumière" in response
+    assert [offer["Hotel Name"] for offer in offers] == ["Hôtel Lumière"]
+    assert offers[0]["Price"] == "100.00 USD"
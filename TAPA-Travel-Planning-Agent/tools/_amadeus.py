@@ -0,0 +1,86 @@
+import diskcache
+import functools
+import pycountry
+import time
+from pathlib import Path
+from tools._http import request_json
+
+# IATA codes and airline names practically never change, so they are cached on disk across
+# agent restarts (shared by the flight and hotel tools) and only refreshed after a month
+REFERENCE_CACHE = diskcache.Cache(str(Path.home() / ".cache" / "amadeus"))
+REFERENCE_CACHE_TTL = 30 * 24 * 60 * 60
+
+# Common English names and former names that the ISO 3166 table does not know, or that its
+# fuzzy search resolves to the wrong country (e.g. 'Korea' to North Korea)
+COUNTRY_ALIASES = {
+    "turkey": "TR",
+    "ivory coast": "CI",
+    "swaziland": "SZ",
+    "burma": "MM",
+    "cape verde": "CV",
+    "dr congo": "CD",
+    "democratic republic of congo": "CD",
+    "east timor": "TL",
+    "korea": "KR",
+    "kosovo": "XK",
+    "holland": "NL",
+    "uk": "GB",
+    "great britain": "GB",
+    "england": "GB",
+    "scotland": "GB",
+    "wales": "GB",
+    "northern ireland": "GB",
+    "russia": "RU",
+    "uae": "AE",
+    "vatican": "VA",
+    "macedonia": "MK",
+}
+
+# OAuth token shared by all Amadeus tools until shortly before it expires
+_token_cache = {"value": None, "expires_at": 0.0}
+
+
+async def get_access_token(base_url: str, api_key: str, api_secret: str) -> str:
+    """Fetches the OAuth token from Amadeus, reusing the cached one while it is valid."""
+    if time.monotonic() < _token_cache["expires_at"] - 30:
+        return _token_cache["value"]
+
+    url = f"{base_url}/v1/security/oauth2/token"
+    response, token_data = await request_json(
+        "POST",
+        url,
+        data={
+            "grant_type": "client_credentials",
+            "client_id": api_key,
+            "client_secret": api_secret,
+        },
+    )
+    response.raise_for_status()
+
+    _token_cache["value"] = token_data.get("access_token")
+    _token_cache["expires_at"] = time.monotonic() + token_data.get("expires_in", 0)
+    return _token_cache["value"]
+
+
+def convert_country_to_code(country_name: str) -> str:
+    """Converts a full country name to an ISO Alpha-2 country code (e.g., 'United Kingdom' -> 'GB')."""
+    return _country_code(country_name.strip().lower())
+
+
+@functools.lru_cache(maxsize=256)
+def _country_code(country_name: str) -> str:
+    if country_name in COUNTRY_ALIASES:
+        return COUNTRY_ALIASES[country_name]
+
+    # Resolved from the bundled ISO 3166 table, other common names are matched fuzzily
+    try:
+        country = pycountry.countries.lookup(country_name)
+    except LookupError:
+        try:
+            country = pycountry.countries.search_fuzzy(country_name)[0]
+        except LookupError:
+            raise ValueError(
+                f"Could not convert country name: {country_name}. Check spelling."
+            ) from None
+
+    return country.alpha_2
@@ -0,0 +1,79 @@
+import asyncio
+import atexit
+import aiohttp
+import contextlib
+import threading
+from typing import Any, Optional, Tuple
+
+# Transient errors (rate limiting, server errors, dropped connections and timeouts) are retried with exponential backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+
+# Event loop running in a background thread and the HTTP session living on it, shared by
+# every Amadeus tool so keep-alive connections and cached DNS lookups survive across queries
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def run(coro):
+    """Runs a coroutine on the background event loop and waits for its result, also works when the caller's own loop is running (e.g. in a notebook)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="amadeus-http", daemon=True
+            ).start()
+
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Returns the shared HTTP session, must be called from the background event loop."""
+    global _session
+    if _session is None:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+        )
+    return _session
+
+
+@atexit.register
+def _close_session():
+    """Closes the shared HTTP session on interpreter exit, while the background loop still runs."""
+    if _session is not None and _loop.is_running():
+        asyncio.run_coroutine_threadsafe(_session.close(), _loop).result(timeout=5)
+
+
+@contextlib.asynccontextmanager
+async def request(method: str, url: str, **kwargs):
+    """Sends a request with the shared session and yields the response, its body is left unread so it can be streamed."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await _get_session().request(method, url, **kwargs)
+        except RETRY_EXCEPTIONS:
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            response.release()
+
+        await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+
+    async with response:
+        yield response
+
+
+async def request_json(
+    method: str, url: str, **kwargs
+) -> Tuple[aiohttp.ClientResponse, Any]:
+    """Sends a request with the shared session and returns the response with its JSON body (None if it is not JSON)."""
+    async with request(method, url, **kwargs) as response:
+        try:
+            return response, await response.json(content_type=None)
+        except ValueError:
+            return response, None
@@ -1,14 +1,26 @@
 import os
-import requests
-import pandas as pd
+import asyncio
 from dotenv import load_dotenv
 from smolagents import Tool
+from tools._amadeus import (
+    REFERENCE_CACHE,
+    REFERENCE_CACHE_TTL,
+    convert_country_to_code,
+    get_access_token,
+)
+from tools._http import request_json, run
+from typing import Dict, Iterable, Tuple
+import json
 import re
+from datetime import date
+
+# Expected travel date format, anchored so trailing characters are rejected
+_DATE_RE = re.compile(r"\A\d{4}-\d{2}-\d{2}\Z")
 
 
 class AmadeusFlightSearchTool(Tool):
     name = "amadeus_flight_search"
-    description = "Finds direct flights between two airports and looks for the best offers. Should be used as default tool for finding flights."
+    description = "Finds direct flights between two airports and looks for the best offers. Should be used as default tool for finding flights. Returns the offers as a JSON list, cheapest first."
     inputs = {
         "departure_city": {
             "type": "string",
@@ -55,33 +67,18 @@ class AmadeusFlightSearchTool(Tool):
                 "Missing Amadeus API credentials. Please make sure the environment variables are set."
             )
 
-        self.token = self.get_access_token()
-
-    def get_access_token(self):
-        """Fetches the OAuth token from Amadeus."""
-        url = f"{self.base_url}/v1/security/oauth2/token"
-        response = requests.post(
-            url,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": self.api_key,
-                "client_secret": self.api_secret,
-            },
-        )
-        response.raise_for_status()
-        return response.json().get("access_token")
-
-    def fetch_flights(
+    async def fetch_flights(
         self,
         departure_airport: str,
         destination_airport: str,
         travel_date: str,
+        token: str,
         currency: str = None,
         adults: int = 1,
     ):
         """Fetches direct flights based on input criteria."""
         url = f"{self.base_url}/v2/shopping/flight-offers"
-        headers = {"Authorization": f"Bearer {self.token}"}
+        headers = {"Authorization": f"Bearer {token}"}
         params = {
             "originLocationCode": departure_airport,
             "destinationLocationCode": destination_airport,
@@ -92,35 +89,66 @@ class AmadeusFlightSearchTool(Tool):
             "max": 10,
         }
 
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 400:
+        response, flights_data = await request_json(
+            "GET", url, headers=headers, params=params
+        )
+        if response.status == 400:
             raise ValueError(
                 "Error fetching flights: Bad request. Check your input parameters."
             )
         response.raise_for_status()
-        return response.json().get("data", [])
+        return flights_data.get("data", [])
 
-    def get_airline_name(self, carrier_code: str):
-        """Fetches the full airline name given an airline IATA code."""
-        url = f"{self.base_url}/v1/reference-data/airlines"
-        headers = {"Authorization": f"Bearer {self.token}"}
-        params = {"airlineCodes": carrier_code}
+    async def get_airline_names(
+        self, carrier_codes: Iterable[str], token: str
+    ) -> Dict[str, str]:
+        """Fetches the full airline names for a set of airline IATA codes in a single request."""
+        airline_names = {
+            code: REFERENCE_CACHE.get(f"al:{code}") for code in set(carrier_codes)
+        }
+        missing_codes = {code for code, name in airline_names.items() if name is None}
 
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200 and response.json().get("data"):
-            return response.json()["data"][0].get("businessName", carrier_code)
-        return carrier_code
+        if missing_codes:
+            url = f"{self.base_url}/v1/reference-data/airlines"
+            headers = {"Authorization": f"Bearer {token}"}
+            params = {"airlineCodes": ",".join(sorted(missing_codes))}
 
-    def get_airport_code(self, city_name: str, country_code: str) -> str:
+            response, airlines_data = await request_json(
+                "GET", url, headers=headers, params=params
+            )
+            if response.status == 200:
+                for airline in airlines_data.get("data", []):
+                    code = airline.get("iataCode")
+                    if code in missing_codes:
+                        airline_names[code] = airline.get("businessName", code)
+                        REFERENCE_CACHE.set(
+                            f"al:{code}",
+                            airline_names[code],
+                            expire=REFERENCE_CACHE_TTL,
+                        )
+
+        # Unknown codes fall back to the code itself
+        return {code: name or code for code, name in airline_names.items()}
+
+    async def get_airport_code(
+        self, city_name: str, token: str, country_code: str
+    ) -> str:
         """Retrieves the IATA airport code for a given city."""
+        cache_key = f"ap:{city_name.strip().lower()}:{country_code}"
+        airport_code = REFERENCE_CACHE.get(cache_key)
+        if airport_code is not None:
+            return airport_code
+
         url = f"{self.base_url}/v1/reference-data/locations"
-        headers = {"Authorization": f"Bearer {self.token}"}
+        headers = {"Authorization": f"Bearer {token}"}
         params = {"keyword": city_name, "subType": "AIRPORT"}
 
-        response = requests.get(url, params=params, headers=headers)
+        response, airports_data = await request_json(
+            "GET", url, params=params, headers=headers
+        )
         response.raise_for_status()
 
-        airports = response.json().get("data", [])
+        airports = airports_data.get("data", [])
         if country_code:
             airports = [
                 airport
@@ -133,20 +161,71 @@ class AmadeusFlightSearchTool(Tool):
                 f"Could not find an airport in {city_name}, {country_code}. Country codes could be wrong or country is not available."
             )
 
+        REFERENCE_CACHE.set(
+            cache_key, airports[0]["iataCode"], expire=REFERENCE_CACHE_TTL
+        )
         return airports[0]["iataCode"]
 
-    def convert_country_to_code(self, country_name: str) -> str:
-        """Converts a full country name to an ISO Alpha-2 country code (e.g., 'United Kingdom' -> 'GB')."""
-        url = f"https://restcountries.com/v3.1/name/{country_name}?fields=cca2"
-        response = requests.get(url)
+    async def _resolve_airports(
+        self,
+        departure_city: str,
+        departure_country: str,
+        destination_city: str,
+        destination_country: str,
+        token: str,
+    ) -> Tuple[str, str]:
+        """Resolves the departure and destination airports concurrently."""
+        departure_country_code = convert_country_to_code(departure_country)
+        destination_country_code = convert_country_to_code(destination_country)
 
-        if response.status_code != 200:
-            raise ValueError(
-                f"Could not convert country name: {country_name}. Check spelling."
-            )
+        return await asyncio.gather(
+            self.get_airport_code(departure_city, token, departure_country_code),
+            self.get_airport_code(destination_city, token, destination_country_code),
+        )
 
-        country_data = response.json()
-        return country_data[0]["cca2"]
+    async def _search_flights(
+        self,
+        departure_city: str,
+        departure_country: str,
+        destination_city: str,
+        destination_country: str,
+        travel_date: str,
+        currency: str,
+        num_adults: int,
+    ) -> Tuple[list, list, Dict[str, str]]:
+        """Looks for direct flights, returning them with their first segments and the names of their airlines."""
+        token = await get_access_token(self.base_url, self.api_key, self.api_secret)
+
+        # Get country and airport codes for departure and destination
+        departure_airport, destination_airport = await self._resolve_airports(
+            departure_city,
+            departure_country,
+            destination_city,
+            destination_country,
+            token,
+        )
+
+        # Look for direct flights
+        flights = await self.fetch_flights(
+            departure_airport,
+            destination_airport,
+            travel_date,
+            token,
+            currency,
+            num_adults,
+        )
+
+        # Resolve the names of all airlines at once instead of once per flight
+        itineraries = [
+            flight.get("itineraries", [{}])[0].get("segments", [{}])[0]
+            for flight in flights
+        ]
+        airline_names = await self.get_airline_names(
+            (itinerary.get("carrierCode", "Unknown") for itinerary in itineraries),
+            token,
+        )
+
+        return flights, itineraries, airline_names
 
     def forward(
         self,
@@ -158,38 +237,38 @@ class AmadeusFlightSearchTool(Tool):
         currency: str = None,
         num_adults: int = 1,
     ) -> str:
-        """Main function that returns flight data as a formatted string."""
+        """Main function that returns flight data as a JSON string."""
         # Validate date format...
-        if not re.match(r"\d{4}-\d{2}-\d{2}", travel_date):
+        if not _DATE_RE.match(travel_date):
             raise ValueError(
                 "Invalid date format. Please use YYYY-MM-DD format for the travel date."
             )
 
-        # Get country codes for departure and destination
-        departure_country_code = self.convert_country_to_code(departure_country)
-        destination_country_code = self.convert_country_to_code(destination_country)
-
-        # Get airport codes for departure and destination
-        departure_airport = self.get_airport_code(
-            departure_city, departure_country_code
-        )
-        destination_airport = self.get_airport_code(
-            destination_city, destination_country_code
-        )
+        # The format is right but the date itself may not exist (e.g. 2025-02-30)
+        try:
+            date.fromisoformat(travel_date)
+        except ValueError:
+            raise ValueError(
+                f"Invalid travel date: {travel_date} is not a valid calendar date."
+            ) from None
 
         currency = currency if currency else "USD"
 
-        # Look for direct flights
-        flights = self.fetch_flights(
-            departure_airport, destination_airport, travel_date, currency, num_adults
+        flights, itineraries, airline_names = run(
+            self._search_flights(
+                departure_city,
+                departure_country,
+                destination_city,
+                destination_country,
+                travel_date,
+                currency,
+                num_adults,
+            )
         )
         flight_list = []
 
-        for flight in flights:
-            itinerary = flight.get("itineraries", [{}])[0].get("segments", [{}])[0]
-            airline_name = self.get_airline_name(
-                itinerary.get("carrierCode", "Unknown")
-            )
+        for flight, itinerary in zip(flights, itineraries):
+            airline_name = airline_names[itinerary.get("carrierCode", "Unknown")]
 
             formatted_flight = {
                 f"Price ({currency})": float(flight.get("price", {}).get("total", 0)),
@@ -203,8 +282,11 @@ class AmadeusFlightSearchTool(Tool):
         if len(flight_list) == 0:
             return f"No direct flights found between {departure_city}, {departure_country} and {destination_city}, {destination_country} on {travel_date}"
 
-        df = pd.DataFrame(sorted(flight_list, key=lambda x: x[f"Price ({currency})"]))
-        return df.to_string(index=False)
+        # Names are kept as UTF-8 instead of \u escapes, which cost the agent extra tokens
+        return json.dumps(
+            sorted(flight_list, key=lambda x: x[f"Price ({currency})"]),
+            ensure_ascii=False,
+        )
 
 
 # Example Usage:
@@ -1,15 +1,42 @@
 import os
-import requests
+import asyncio
+import aiohttp
+import ijson
 from dotenv import load_dotenv
 from smolagents import Tool
-from typing import List
-import pandas as pd
+from tools._amadeus import (
+    REFERENCE_CACHE,
+    REFERENCE_CACHE_TTL,
+    convert_country_to_code,
+    get_access_token,
+)
+from tools._http import request, request_json, run
+from typing import Dict, List, Optional
+import json
+import logging
 import re
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
+
+# No need to overflow the API for this demo...
+MAX_HOTELS = 50
+MAX_OFFERS = 15
+
+# Hotel ids sent in a single hotel-offers request
+HOTEL_IDS_PER_REQUEST = 20
+
+# Concurrent hotel-offers requests, to respect the Amadeus rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
+# Expected input formats, anchored so trailing characters are rejected
+_DATE_RE = re.compile(r"\A\d{4}-\d{2}-\d{2}\Z")
+_PRICE_RE = re.compile(r"\A\d+-\d+\Z")
 
 
 class AmadeusHotelFinderTool(Tool):
     name = "amadeus_hotel_finder"
-    description = "Finds available hotel rooms, in a given city/country and look for the best offers. Should be used as default for finding hotels."
+    description = "Finds available hotel rooms, in a given city/country and look for the best offers. Should be used as default for finding hotels. Returns the offers as a JSON list."
     inputs = {
         "city_name": {
             "type": "string",
@@ -57,30 +84,24 @@ class AmadeusHotelFinderTool(Tool):
                 "Missing Amadeus API credentials. Please make sure the environment variables are set."
             )
 
-    def get_access_token(self) -> str:
-        """Fetches the OAuth token from Amadeus."""
-        url = f"{self.base_url}/v1/security/oauth2/token"
-        response = requests.post(
-            url,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": self.api_key,
-                "client_secret": self.api_secret,
-            },
-        )
-        response.raise_for_status()
-        return response.json().get("access_token")
-
-    def get_city_code(self, city_name: str, token: str, country_code: str) -> str:
+    async def get_city_code(self, city_name: str, token: str, country_code: str) -> str:
         """Retrieves the IATA city code for a given city name."""
+        cache_key = f"city:{city_name.strip().lower()}:{country_code}"
+        city_code = REFERENCE_CACHE.get(cache_key)
+        if city_code is not None:
+            return city_code
+
         url = f"{self.base_url}/v1/reference-data/locations"
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(
-            url, params={"keyword": city_name, "subType": "CITY"}, headers=headers
+        response, response_data = await request_json(
+            "GET",
+            url,
+            params={"keyword": city_name, "subType": "CITY"},
+            headers=headers,
         )
         response.raise_for_status()
 
-        city_data = response.json().get("data", [])
+        city_data = response_data.get("data", [])
         if country_code:
             city_data = [
                 city
@@ -93,26 +114,17 @@ class AmadeusHotelFinderTool(Tool):
                 f"Could not find city code for {city_name}. Maybe it's not available."
             )
 
+        REFERENCE_CACHE.set(
+            cache_key, city_data[0]["iataCode"], expire=REFERENCE_CACHE_TTL
+        )
         return city_data[0]["iataCode"]
 
-    def convert_country_to_code(self, country_name: str) -> str:
-        """Converts a full country name to an ISO Alpha-2 country code (e.g., 'United Kingdom' -> 'GB')."""
-        url = f"https://restcountries.com/v3.1/name/{country_name}?fields=cca2"
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            raise ValueError(
-                f"Could not convert country name: {country_name}. Check spelling."
-            )
-
-        country_data = response.json()
-        return country_data[0]["cca2"]
-
-    def fetch_hotels(self, city_code: str, token: str, radius: int) -> List[str]:
+    async def fetch_hotels(self, city_code: str, token: str, radius: int) -> List[str]:
         """Fetches available hotel IDs in a given city using the city code."""
         url = f"{self.base_url}/v1/reference-data/locations/hotels/by-city"
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(
+        response, response_data = await request_json(
+            "GET",
             url,
             params={
                 "cityCode": city_code,
@@ -124,13 +136,13 @@ class AmadeusHotelFinderTool(Tool):
         )
         response.raise_for_status()
 
-        hotels_data = response.json().get("data", [])
+        hotels_data = response_data.get("data", [])
         if not hotels_data:
             raise ValueError(f"No hotels found for city with code {city_code}")
 
         return [hotel["hotelId"] for hotel in hotels_data]
 
-    def fetch_hotel_offers(
+    async def fetch_hotel_offers(
         self,
         hotel_ids: List[str],
         check_in: str,
@@ -139,67 +151,169 @@ class AmadeusHotelFinderTool(Tool):
         price_range: str,
         currency: str,
         token: str,
-    ) -> str:
-        """Fetches hotel offers and returns them as a formatted DataFrame string."""
+    ) -> Optional[str]:
+        """
+        Fetches the offers of all hotels in concurrent batched requests, stopping once enough offers
+        are found. Returns them as a JSON list of offers, or None when there are none.
+        """
         url = f"{self.base_url}/v3/shopping/hotel-offers"
+        headers = {"Authorization": f"Bearer {token}"}
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        enough_offers = asyncio.Event()
         data = []
 
-        for hotel_id in hotel_ids[:50]:
+        hotel_ids = [str(hotel_id) for hotel_id in hotel_ids[:MAX_HOTELS]]
+        batches = [
+            hotel_ids[i : i + HOTEL_IDS_PER_REQUEST]
+            for i in range(0, len(hotel_ids), HOTEL_IDS_PER_REQUEST)
+        ]
+
+        await asyncio.gather(
+            *(
+                self._fetch_batch(
+                    semaphore,
+                    enough_offers,
+                    url,
+                    headers,
+                    batch,
+                    check_in,
+                    check_out,
+                    adults,
+                    price_range,
+                    currency,
+                    data,
+                )
+                for batch in batches
+            )
+        )
+
+        if not data:
+            return None
+
+        return json.dumps(data[:MAX_OFFERS], ensure_ascii=False)
+
+    async def _fetch_batch(
+        self,
+        semaphore: asyncio.Semaphore,
+        enough_offers: asyncio.Event,
+        url: str,
+        headers: Dict[str, str],
+        hotel_ids: List[str],
+        check_in: str,
+        check_out: str,
+        adults: int,
+        price_range: str,
+        currency: str,
+        data: List[dict],
+    ):
+        """Fetches the offers of a batch of hotels in a single request and appends them to data."""
+        params = {
+            "hotelIds": ",".join(hotel_ids),
+            "adults": adults,
+            "checkInDate": check_in,
+            "checkOutDate": check_out,
+            "priceRange": price_range if price_range else None,
+            "currency": currency if currency else None,
+            "bestRateOnly": "true",
+        }
+
+        async with semaphore:
+            if enough_offers.is_set():
+                return
+
             try:
-                params = {
-                    "hotelIds": str(hotel_id),
-                    "adults": adults,
-                    "checkInDate": check_in,
-                    "checkOutDate": check_out,
-                    "priceRange": price_range if price_range else None,
-                    "currency": currency if currency else None,
-                    "bestRateOnly": "true",
-                }
-
-                headers = {"Authorization": f"Bearer {token}"}
-
-                response = requests.get(
+                async with request(
+                    "GET",
                     url,
                     params={k: v for k, v in params.items() if v is not None},
                     headers=headers,
-                )
+                ) as response:
+                    if response.status != 200:
+                        response_data = await response.json(content_type=None)
+                        # Error bodies may be empty or lack the usual errors list
+                        if isinstance(response_data, dict) and response_data.get(
+                            "errors"
+                        ):
+                            response_data = response_data["errors"][0].get(
+                                "detail", response_data
+                            )
+                        logger.debug(
+                            "Failed to fetch hotel offers (HTTP %s): %s",
+                            response.status,
+                            response_data,
+                        )
+                        return
+
+                    # Parse the offers one at a time instead of loading the whole response in memory
+                    async for offer in ijson.items(
+                        response.content, "data.item", use_float=True
+                    ):
+                        # Another batch may have reached the cap while this one was reading
+                        if enough_offers.is_set():
+                            return
+
+                        # Hotels without an available offer are skipped
+                        hotel_offers = offer.get("offers")
+                        if not hotel_offers:
+                            continue
+
+                        hotel = offer.get("hotel", {})
+                        price = hotel_offers[0]["price"]["total"]
+
+                        data.append(
+                            {
+                                "Hotel Name": hotel.get("name", "Unknown Hotel"),
+                                "Price": f"{price} {currency}",
+                                "Check-in Date": check_in,
+                                "Check-out Date": check_out,
+                                "Latitude": hotel.get("latitude", "N/A"),
+                                "Longitude": hotel.get("longitude", "N/A"),
+                            }
+                        )
+
+                        # Stop reading the moment the cap is reached
+                        if len(data) >= MAX_OFFERS:
+                            enough_offers.set()
+                            return
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ijson.JSONError,
+                KeyError,
+                ValueError,
+            ) as e:
+                # A failed batch only means fewer offers to choose from
+                logger.debug("Failed to fetch hotel offers for %s: %s", hotel_ids, e)
+
+    async def _find_hotel_offers(
+        self,
+        city_name: str,
+        radius: int,
+        country: str,
+        num_adults: int,
+        check_in_date: str,
+        check_out_date: str,
+        price_range: str,
+        currency: str,
+    ) -> Optional[str]:
+        """Looks up the hotels of a city and fetches their best offers."""
+        country_code = convert_country_to_code(country)
+        token = await get_access_token(self.base_url, self.api_key, self.api_secret)
+        city_code = await self.get_city_code(city_name, token, country_code)
+        hotel_ids = await self.fetch_hotels(city_code, token, radius)
+
+        if not hotel_ids:
+            raise ValueError(f"No hotels found in {city_name}, {country}")
 
-                if response.status_code != 200:
-                    raise ValueError(
-                        f"Failed to fetch hotel offers: {response.json().get('errors', [{}])[0].get('detail', response.json())}"
-                    )
-
-                offers = response.json().get("data", [])
-                if not offers:
-                    return "No hotel offers found for this hotel."
-                for offer in offers:
-                    hotel_name = offer.get("hotel", {}).get("name", "Unknown Hotel")
-                    latitude = offer.get("hotel", {}).get("latitude", "N/A")
-                    longitude = offer.get("hotel", {}).get("longitude", "N/A")
-                    price = (
-                        offer["offers"][0]["price"]["total"]
-                        if "offers" in offer
-                        else "N/A"
-                    )
-
-                    data.append(
-                        {
-                            "Hotel Name": hotel_name,
-                            "Price": f"{price} {currency}",
-                            "Check-in Date": check_in,
-                            "Check-out Date": check_out,
-                            "Latitude": latitude,
-                            "Longitude": longitude,
-                        }
-                    )
-            except Exception as e:
-                continue
-            # No need to overflow the API for this demo...
-            if len(data) >= 15:
-                break
-
-        df = pd.DataFrame(data)
-        return df.to_string(index=False)
+        return await self.fetch_hotel_offers(
+            hotel_ids,
+            check_in_date,
+            check_out_date,
+            num_adults,
+            price_range,
+            currency,
+            token,
+        )
 
     def forward(
         self,
@@ -214,35 +328,36 @@ class AmadeusHotelFinderTool(Tool):
     ) -> str:
         """Main method that retrieves the best hotel offers in a given city."""
         # Check format for price range and check-in date
-        if price_range and not re.match(r"\d+-\d+", price_range):
+        if price_range and not _PRICE_RE.match(price_range):
             raise ValueError("Invalid price range format. Please use min-max format.")
 
-        if not re.match(r"\d{4}-\d{2}-\d{2}", check_in_date):
+        if not _DATE_RE.match(check_in_date):
             raise ValueError(
                 "Invalid date format. Please use YYYY-MM-DD format for the check-in date."
             )
 
-        token = self.get_access_token()
-        country_code = self.convert_country_to_code(country)
-        city_code = self.get_city_code(city_name, token, country_code)
-        hotel_ids = self.fetch_hotels(city_code, token, radius)
-
-        if not hotel_ids:
-            raise ValueError(f"No hotels found in {city_name}, {country}")
+        # The format is right but the date itself may not exist (e.g. 2025-02-30)
+        try:
+            check_in = date.fromisoformat(check_in_date)
+        except ValueError:
+            raise ValueError(
+                f"Invalid check-in date: {check_in_date} is not a valid calendar date."
+            ) from None
 
         currency = currency if currency else "USD"
 
-        check_out_date = (
-            pd.to_datetime(check_in_date) + pd.Timedelta(days=stay_days)
-        ).strftime("%Y-%m-%d")
-        hotel_offers = self.fetch_hotel_offers(
-            hotel_ids,
-            check_in_date,
-            check_out_date,
-            num_adults,
-            price_range,
-            currency,
-            token,
+        check_out_date = (check_in + timedelta(days=stay_days)).isoformat()
+        hotel_offers = run(
+            self._find_hotel_offers(
+                city_name,
+                radius,
+                country,
+                num_adults,
+                check_in_date,
+                check_out_date,
+                price_range,
+                currency,
+            )
         )
 
         if hotel_offers is None:
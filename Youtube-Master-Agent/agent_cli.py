@@ -2,6 +2,11 @@ import click
 import asyncio
 from agents.tubemaster import TubeMasterAgent
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 
 @click.command()
 @click.option(
@@ -26,19 +31,11 @@ def main(show_reasoning, model_name, respond_json):
     """
     CLI chat tool to interact with TubeMasterAgent asynchronously.
     """
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
+    # Use the libuv-based event loop when available, it schedules tasks faster than asyncio's
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
-    if loop and loop.is_running():
-        # If a loop exists, create a background task
-        print("Detected running event loop, using `asyncio.create_task()`")
-        task = loop.create_task(chat_loop(show_reasoning, model_name, respond_json))
-        loop.run_until_complete(task)  # Run until this task finishes
-    else:
-        # If no loop exists, start a fresh one
-        asyncio.run(chat_loop(show_reasoning, model_name, respond_json))
+    asyncio.run(chat_loop(show_reasoning, model_name, respond_json))
 
 
 async def chat_loop(show_reasoning, model_name, json_response=False):
@@ -50,7 +47,8 @@ async def chat_loop(show_reasoning, model_name, json_response=False):
     print(f"Reasoning visible: {show_reasoning}\n")
 
     while True:
-        prompt = input("You: ").strip()
+        # Wait for the user's input in a worker thread so the event loop keeps running
+        prompt = (await asyncio.to_thread(input, "You: ")).strip()
 
         if prompt.lower() in ["exit", "quit"]:
             print("******** Goodbye! See you next time! ********")
@@ -62,6 +60,8 @@ async def chat_loop(show_reasoning, model_name, json_response=False):
         print(response)
         print("\n")
 
+    await agent.aclose()
+
 
 if __name__ == "__main__":
     main()
@@ -2,29 +2,26 @@ import gradio as gr
 import asyncio
 from agents.tubemaster import TubeMasterAgent
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 # 🔹 Global agent instance (default settings)
 DEFAULT_MODEL = "Qwen/Qwen2.5-Coder-32B-Instruct"
 global_agent = TubeMasterAgent(model_id=DEFAULT_MODEL, respond_json=False)
 
-# 🔹 Create a global event loop and start it immediately
-global_loop = asyncio.get_event_loop()
-
-# Start the event loop if it's not running already (only needs to run once)
-if not global_loop.is_running():
-    asyncio.set_event_loop(global_loop)
 
+async def respond(message, history, show_reasoning, request: gr.Request):
+    """Handles responses from the global TubeMasterAgent asynchronously on Gradio's event loop, with one conversation per browser session."""
+    return await global_agent.call_agent(
+        message, show_reasoning=show_reasoning, session_id=request.session_hash
+    )
 
-async def generate_response(message, history, show_reasoning):
-    """Handles responses from the global TubeMasterAgent asynchronously."""
-    response = await global_agent.call_agent(message, show_reasoning=show_reasoning)
-    return response
 
-
-def respond(message, history, show_reasoning):
-    """Handles multiple requests using a shared event loop."""
-    # If the global loop is running, use it to create a task
-    task = global_loop.create_task(generate_response(message, history, show_reasoning))
-    return global_loop.run_until_complete(task)
+def end_session(request: gr.Request):
+    """Forgets the conversation of a browser session once it is closed."""
+    global_agent.end_session(request.session_hash)
 
 
 # 🔹 UI Components
@@ -34,6 +31,11 @@ demo = gr.ChatInterface(
     title="TubeMaster AI Agent",
     description="An agent that can transcribe, summarize and understand YouTube video content for Q&As, and more!",
 )
+demo.unload(end_session)
 
 if __name__ == "__main__":
+    # Use the libuv-based event loop for Gradio's server when available
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     demo.launch()
@@ -1,21 +1,59 @@
 import asyncio
-import dotenv
-import os
+import aiohttp
+import functools
+import re
+from typing import Dict, List, Optional
 from llama_index.llms.huggingface_api import HuggingFaceInferenceAPI
 from llama_index.core.agent.workflow import AgentWorkflow, ToolCallResult, AgentStream
 from llama_index.core.workflow import Context
 from llama_index.core.tools import FunctionTool
-from llama_index.core.llms import ChatMessage, MessageRole
-from llama_index.core import ChatPromptTemplate
+from config import HF_TOKEN
 
 
 # Import tools
-from tools.response_formatter import json_response_formatter
-from tools.transcriber import transcribe_audio
+from tools.response_formatter import json_response_formatter, text_response_formatter
+from tools.transcriber import (
+    TRANSCRIPT_CACHE,
+    create_session,
+    transcribe_audio_batch,
+)
+from tools.video_pipeline import fetch_and_transcribe
 from tools.youtube_fetcher import download_youtube_audio
 
-# Load environment variables
-dotenv.load_dotenv()
+
+@functools.lru_cache(maxsize=4)
+def _get_llm(model_id: str, token: str) -> HuggingFaceInferenceAPI:
+    """
+    Returns a shared LLM client per model, so agents reuse its HTTP connections.
+    """
+    return HuggingFaceInferenceAPI(model_name=model_id, token=token)
+
+
+# Cheap local relevance check, used instead of asking the LLM a second time
+RELEVANT_REQUEST_PATTERN = re.compile(
+    r"(youtu\.be|youtube\.com|video|summari[sz]e|transcri)", re.IGNORECASE
+)
+UNRELATED_REQUEST_RESPONSE = (
+    "I'm sorry, but I can only assist with YouTube video-related tasks."
+)
+
+
+# Session used when the caller does not distinguish between users (e.g. the CLI)
+DEFAULT_SESSION_ID = "default"
+
+
+class _Conversation:
+    """
+    The agent's memory for one chat session, bound to the event loop it was created on.
+    """
+
+    def __init__(self, agent: AgentWorkflow):
+        self.context = Context(agent)
+        self.loop = asyncio.get_running_loop()
+        # A Context can only run one workflow at a time
+        self.lock = asyncio.Lock()
+        # Follow-up questions are allowed once a video was discussed in this session
+        self.video_in_context = False
 
 
 class TubeMasterAgent:
@@ -29,27 +67,48 @@ class TubeMasterAgent:
         Initializes the agent with the required tools and system prompt.
         """
 
-        # Load the HF token
-        token = os.getenv("HF_API_KEY")
-        if token is None:
-            raise ValueError("Please set the HF_API_KEY environment variable.")
-
         # Large Language Model(LLM)
-        self.llm = HuggingFaceInferenceAPI(model_name=model_id, token=token)
+        self.llm = _get_llm(model_id, HF_TOKEN)
+
+        # HTTP session shared by all transcription requests (created lazily inside the event loop)
+        self._session: Optional[aiohttp.ClientSession] = None
 
-        # Create the response formatting tool for video summaries
+        # Transcription tool bound to the agent's HTTP session
+        transcription_tool = FunctionTool.from_defaults(
+            async_fn=self.transcribe_audio_files,
+            name="transcribe_audio",
+            description=(
+                "Transcribes one or more audio files into text. Pass all audio files you need at once."
+            ),
+        )
+
+        # Download and transcription pipeline, one tool call for any number of videos
+        pipeline_tool = FunctionTool.from_defaults(
+            async_fn=self.fetch_and_transcribe_videos,
+            name="fetch_and_transcribe",
+            description=(
+                "Downloads and transcribes one or more YouTube videos given their URLs. Pass all video URLs at once."
+            ),
+        )
+
+        # Create the response formatting tool for video summaries, its output is the final answer
         response_format_tool = FunctionTool.from_defaults(
-            async_fn=json_response_formatter,
+            async_fn=(
+                json_response_formatter if respond_json else text_response_formatter
+            ),
             name="video_summary_response_formatter",
             description=(
                 "Provides a JSON-like formatted response with the summaries, titles, topics, URLs for all videos the user asked for."
+                if respond_json
+                else "Provides a multi-line formatted response with the summaries, titles, topics, URLs for all videos the user asked for."
             ),
-            return_direct=True if respond_json else False,
+            return_direct=True,
         )
 
         self.agent = AgentWorkflow.from_tools_or_functions(
             tools_or_functions=[
-                transcribe_audio,
+                pipeline_tool,
+                transcription_tool,
                 download_youtube_audio,
                 response_format_tool,
             ],
@@ -58,33 +117,110 @@ class TubeMasterAgent:
                 "You are an AI assistant that can use tools to transcribe audio from YouTube videos, "
                 "create summaries of the video's content, provide contextual information, or can directly answer related questions. "
                 "Before you proceed to solve a task always make sure it is related to your role and non-empty/ mi. "
-                "You will NEVER respond to tasks unrelated to your role; instead, alert the user that you cannot perform the task. "
+                "You will NEVER respond to tasks unrelated to your role; instead, simply reply: "
+                f"'{UNRELATED_REQUEST_RESPONSE}' "
+                "Provided summaries should always be relatively short. "
+                "To transcribe YouTube videos, pass all of their URLs at once to the fetch_and_transcribe tool. "
+                "When only a video's title is needed, call download_youtube_audio with metadata_only set to true. "
                 "For failed transcriptions, return only successful results along with a detailed explanation of errors. "
-                "ALWAYS use available tools to format the response nicely if a tool is suitable to the user's request."
+                "ALWAYS use available tools to format the response nicely if a tool is suitable to the user's request. "
+                "When providing video summaries, call the video_summary_response_formatter tool as your final step, "
+                "its output is returned to the user as is."
             ),
         )
 
-        # Agent's memory
-        self.context = Context(self.agent)
+        # Agent's memory per chat session, created on first use since a Context is bound to the event loop running it
+        self._conversations: Dict[str, _Conversation] = {}
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Hit/miss counters of the transcription cache.
+        """
+        return TRANSCRIPT_CACHE.stats()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the agent's HTTP session, creating it on first use.
+        """
+        if self._session is None or self._session.closed:
+            self._session = create_session()
+        return self._session
+
+    def _get_conversation(self, session_id: str) -> _Conversation:
+        """
+        Returns the memory of a chat session, starting a new one when the agent is used from another event loop.
+        """
+        conversation = self._conversations.get(session_id)
+        if conversation is None or conversation.loop is not asyncio.get_running_loop():
+            conversation = self._conversations[session_id] = _Conversation(self.agent)
+        return conversation
+
+    def end_session(self, session_id: str) -> None:
+        """
+        Forgets the memory of a chat session.
+        """
+        self._conversations.pop(session_id, None)
+
+    async def aclose(self) -> None:
+        """
+        Closes the HTTP session used by the agent's tools.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
-    async def verify_relevance(self, user_prompt: str, response: str) -> bool:
+    async def transcribe_audio_files(self, audio_files: List[str]) -> str:
         """
-        Verifies if the response is relevant to the user's prompt.
+        Concurrently transcribes a list of audio files into text.
         """
-        verification_prompt = (
-            f"User Prompt: {user_prompt}\n\nAgent Response: {response}\n\n"
-            "Is the agent's response relevant to the user's prompt? Answer with 'yes' or 'no'."
+        transcriptions = await transcribe_audio_batch(
+            audio_files, session=self._get_session()
         )
 
-        verification_response = self.llm.complete(verification_prompt)
-        return "yes" in verification_response.text.lower()
+        return "\n\n".join(
+            f"Audio file: {audio_file}, Transcription: {transcription}"
+            for audio_file, transcription in zip(audio_files, transcriptions)
+        )
 
-    async def call_agent(self, user_prompt: str, show_reasoning: bool = False) -> str:
+    async def fetch_and_transcribe_videos(self, urls: List[str]) -> str:
+        """
+        Downloads and transcribes a list of YouTube videos, overlapping downloads and transcriptions.
+        """
+        results = await fetch_and_transcribe(urls, session=self._get_session())
+        return "\n\n".join(results)
+
+    async def call_agent(
+        self,
+        user_prompt: str,
+        show_reasoning: bool = False,
+        session_id: str = DEFAULT_SESSION_ID,
+    ) -> str:
         """
         Asynchronously processes a string prompt containing YouTube video URLs.
+        Each session_id (e.g. one per Gradio user) has its own conversation memory.
+        """
+        conversation = self._get_conversation(session_id)
+
+        # Messages of the same session are answered one at a time, other sessions run concurrently
+        async with conversation.lock:
+            return await self._run_agent(user_prompt, conversation, show_reasoning)
+
+    async def _run_agent(
+        self, user_prompt: str, conversation: _Conversation, show_reasoning: bool
+    ) -> str:
         """
+        Runs the agent workflow on a prompt with the given conversation memory.
+        """
+        # Reject unrelated requests without spending an LLM call on them
+        if not conversation.video_in_context and not RELEVANT_REQUEST_PATTERN.search(
+            user_prompt
+        ):
+            return UNRELATED_REQUEST_RESPONSE
+        conversation.video_in_context = True
+
         # Run the agent (Wraps the LlamaIndex AgentWorkflow run method)
-        handler = self.agent.run(self.format_user_prompt(user_prompt), ctx=self.context)
+        handler = self.agent.run(user_prompt, ctx=conversation.context)
 
         # Stream events and capture responses if needed
         if show_reasoning:
@@ -102,33 +238,4 @@ class TubeMasterAgent:
         # Get the final response
         response = await handler
 
-        response_text = response.response.blocks[-1].text
-
-        if not await self.verify_relevance(user_prompt, response_text):
-            return "Seems like I failed to understand your request. Please provide more specific instructions."
-
-        return response_text
-
-    def format_user_prompt(self, user_request: str) -> str:
-        """
-        Formats the user's input to explicitly instruct the LLM to respond only if the request
-        relates to YouTube video transcription, summarization, question answering, or understanding.
-        """
-
-        message_templates = [
-            ChatMessage(
-                content="You are an AI assistant specialized in YouTube video transcription, summarization, "
-                "content understanding, and answering related questions.\n"
-                "ONLY respond if the request is related to these tasks.\n"
-                "Provided summaries should always be relatively short.\n"
-                "If the request is unrelated, simply reply: 'I'm sorry, but I can only assist with YouTube video-related tasks.'\n\n",
-                role=MessageRole.SYSTEM,
-            ),
-            ChatMessage(content=f"Request: {user_request}", role=MessageRole.USER),
-        ]
-
-        chat_template = ChatPromptTemplate(message_templates=message_templates)
-
-        formatted_prompt = chat_template.format()
-
-        return formatted_prompt
+        return response.response.blocks[-1].text
@@ -0,0 +1,10 @@
+import os
+import dotenv
+
+# Load environment variables from a .env file, if any
+dotenv.load_dotenv()
+
+# HF token shared by the agent's LLM and the Whisper transcriber, failing fast when it is missing
+HF_TOKEN = os.getenv("HF_API_KEY")
+if HF_TOKEN is None:
+    raise RuntimeError("Please set the HF_API_KEY environment variable.")
@@ -0,0 +1,4 @@
+import os
+
+# The HF token is read when the tools are imported, the tests never reach Hugging Face
+os.environ.setdefault("HF_API_KEY", "test-token")
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from tools.audio_chunker import SILENCE_THRESHOLD, split_on_silence
+
+SR = 16000
+
+
+def noise(seconds: float) -> np.ndarray:
+    """Audio without any silence, so chunks are cut at the length limit."""
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(round(seconds * SR))) * 8000).astype(np.int16)
+
+
+def chunk_seconds(pcm: np.ndarray) -> list:
+    boundaries = split_on_silence(pcm, SR, SILENCE_THRESHOLD, 30.0, 1.0)
+    assert boundaries[0] == 0 and boundaries[-1] == len(pcm)
+    return list(np.round(np.diff(boundaries) / SR, 2))
+
+
+@pytest.mark.parametrize(
+    "seconds, expected",
+    [
+        (20.0, [20.0]),
+        (30.03, [30.03]),
+        (60.02, [30.0, 30.02]),
+        (90.05, [30.0, 30.0, 30.05]),
+        (61.5, [30.0, 30.0, 1.5]),
+    ],
+)
+def test_short_remainders_are_folded_into_the_previous_chunk(seconds, expected):
+    assert chunk_seconds(noise(seconds)) == expected
+
+
+def test_silence_crossing_the_limit_does_not_produce_tiny_chunks():
+    pcm = noise(95.0)
+    for start, end in [(20.98, 31.0), (50.0, 61.5), (88.0, 89.0)]:
+        pcm[int(start * SR) : int(end * SR)] = 0
+
+    assert min(chunk_seconds(pcm)) >= 1.0
+
+
+def test_long_silence_is_cut_at_the_limit():
+    pcm = noise(100.0)
+    pcm[10 * SR : 80 * SR] = 0
+
+    assert max(chunk_seconds(pcm)) <= 30.0
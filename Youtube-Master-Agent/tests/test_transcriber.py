@@ -0,0 +1,217 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tools import transcriber
+from tools.transcript_cache import TranscriptCache
+
+
+@pytest.fixture(autouse=True)
+def transcript_cache(tmp_path, monkeypatch):
+    cache = TranscriptCache(tmp_path / "cache")
+    monkeypatch.setattr(transcriber, "TRANSCRIPT_CACHE", cache)
+    return cache
+
+
+@pytest.fixture
+def audio_files(tmp_path):
+    """Short audio files, sent to Whisper without being split."""
+    files = []
+    for name in ["a", "b", "c"]:
+        audio_file = tmp_path / f"{name}.wav"
+        audio_file.write_bytes(f"audio {name}".encode())
+        files.append(str(audio_file))
+    return files
+
+
+def transcribe_with_batch_endpoint(monkeypatch, handler, audio_files, max_batch):
+    async def run():
+        app = web.Application()
+        app.router.add_post("/batch", handler)
+        async with TestServer(app) as server:
+            monkeypatch.setattr(
+                transcriber, "WHISPER_HF_BATCH_API_URL", str(server.make_url("/batch"))
+            )
+            async with aiohttp.ClientSession() as session:
+                return await transcriber.transcribe_audio_batch(
+                    audio_files, session, max_batch
+                )
+
+    return asyncio.run(run())
+
+
+def test_batch_endpoint_multipart_contract(monkeypatch, audio_files):
+    batches = []
+
+    async def handler(request):
+        # Every file is sent as an "inputs" part, the reply lists one result per part in order
+        contents = []
+        async for part in await request.multipart():
+            assert part.name == "inputs"
+            assert part.headers[aiohttp.hdrs.CONTENT_TYPE] == "audio/x-wav"
+            contents.append((await part.read()).decode())
+        batches.append(contents)
+        return web.json_response(
+            [{"text": f"text of {content}"} for content in contents]
+        )
+
+    transcriptions = transcribe_with_batch_endpoint(
+        monkeypatch, handler, audio_files, max_batch=2
+    )
+
+    assert transcriptions == ["text of audio a", "text of audio b", "text of audio c"]
+    assert sorted(len(batch) for batch in batches) == [1, 2]
+
+
+def test_batch_endpoint_skips_cached_files(monkeypatch, audio_files, transcript_cache):
+    key = transcript_cache.hash_file(audio_files[1])
+    transcript_cache.put(key, "cached text")
+    batches = []
+
+    async def handler(request):
+        contents = []
+        async for part in await request.multipart():
+            contents.append((await part.read()).decode())
+        batches.append(contents)
+        return web.json_response(
+            [{"text": f"text of {content}"} for content in contents]
+        )
+
+    transcriptions = transcribe_with_batch_endpoint(
+        monkeypatch, handler, audio_files, max_batch=8
+    )
+
+    assert transcriptions == ["text of audio a", "cached text", "text of audio c"]
+    assert batches == [["audio a", "audio c"]] or batches == [["audio c", "audio a"]]
+
+
+def test_batch_endpoint_reply_of_the_wrong_length_fails_the_batch(
+    monkeypatch, audio_files
+):
+    async def handler(request):
+        async for part in await request.multipart():
+            await part.read()
+        return web.json_response([{"text": "only one"}])
+
+    transcriptions = transcribe_with_batch_endpoint(
+        monkeypatch, handler, audio_files[:2], max_batch=8
+    )
+
+    assert transcriptions == [
+        transcriber.TRANSCRIPTION_FAILED_MESSAGE.format(audio_file=audio_file)
+        for audio_file in audio_files[:2]
+    ]
+
+
+def test_a_failing_file_does_not_fail_the_others(monkeypatch, audio_files, tmp_path):
+    async def handler(request):
+        return web.json_response({"text": f"text of {(await request.read()).decode()}"})
+
+    async def run(missing_file):
+        app = web.Application()
+        app.router.add_post("/whisper", handler)
+        async with TestServer(app) as server:
+            monkeypatch.setattr(
+                transcriber, "WHISPER_HF_API_URL", str(server.make_url("/whisper"))
+            )
+            async with aiohttp.ClientSession() as session:
+                return await transcriber.transcribe_audio_batch(
+                    [audio_files[0], missing_file], session
+                )
+
+    missing_file = str(tmp_path / "missing.wav")
+    transcriptions = asyncio.run(run(missing_file))
+
+    assert transcriptions[0] == "text of audio a"
+    assert transcriptions[1].startswith(f"Transcription failed for {missing_file}: ")
+
+
+def test_a_failing_file_does_not_hold_back_the_batch(
+    monkeypatch, audio_files, tmp_path
+):
+    async def handler(request):
+        contents = []
+        async for part in await request.multipart():
+            contents.append((await part.read()).decode())
+        return web.json_response(
+            [{"text": f"text of {content}"} for content in contents]
+        )
+
+    missing_file = str(tmp_path / "missing.wav")
+    transcriptions = transcribe_with_batch_endpoint(
+        monkeypatch, handler, [missing_file, audio_files[0]], max_batch=8
+    )
+
+    assert transcriptions[0].startswith(f"Transcription failed for {missing_file}: ")
+    assert transcriptions[1] == "text of audio a"
+
+
+def transcribe_with_endpoint(monkeypatch, handler, audio_files):
+    monkeypatch.setattr(transcriber, "RETRY_BACKOFF", 0)
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/whisper", handler)
+        async with TestServer(app) as server:
+            monkeypatch.setattr(
+                transcriber, "WHISPER_HF_API_URL", str(server.make_url("/whisper"))
+            )
+            async with aiohttp.ClientSession() as session:
+                return await transcriber.transcribe_audio_batch(audio_files, session)
+
+    return asyncio.run(run())
+
+
+def test_dropped_connections_and_rate_limits_are_retried(monkeypatch, audio_files):
+    attempts = {}
+
+    async def handler(request):
+        content = (await request.read()).decode()
+        attempts[content] = attempts.get(content, 0) + 1
+        if content == "audio b" and attempts[content] == 1:
+            request.transport.close()
+        if content == "audio c" and attempts[content] == 1:
+            return web.Response(status=429)
+        return web.json_response({"text": f"text of {content}"})
+
+    transcriptions = transcribe_with_endpoint(monkeypatch, handler, audio_files)
+
+    assert transcriptions == ["text of audio a", "text of audio b", "text of audio c"]
+    assert attempts == {"audio a": 1, "audio b": 2, "audio c": 2}
+
+
+def test_a_request_failing_every_retry_only_fails_its_file(monkeypatch, audio_files):
+    async def handler(request):
+        content = (await request.read()).decode()
+        if content == "audio b":
+            request.transport.close()
+        return web.json_response({"text": f"text of {content}"})
+
+    transcriptions = transcribe_with_endpoint(monkeypatch, handler, audio_files)
+
+    assert transcriptions == [
+        "text of audio a",
+        transcriber.TRANSCRIPTION_FAILED_MESSAGE.format(audio_file=audio_files[1]),
+        "text of audio c",
+    ]
+
+
+def test_concurrent_requests_are_capped(monkeypatch, audio_files):
+    monkeypatch.setattr(transcriber, "MAX_CONCURRENT_REQUESTS", 2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return web.json_response({"text": (await request.read()).decode()})
+
+    transcribe_with_endpoint(monkeypatch, handler, audio_files)
+
+    assert max_in_flight == 2
@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.transcript_cache import TranscriptCache
+
+
+def test_concurrent_writers_of_the_same_key(tmp_path):
+    cache = TranscriptCache(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [
+            executor.submit(cache.put, "key", f"text {i}") for i in range(200)
+        ]:
+            future.result()
+
+    assert cache.get("key").startswith("text ")
+    assert [path.name for path in tmp_path.iterdir()] == ["key.json"]
+
+
+def test_get_does_not_recreate_an_evicted_entry(tmp_path, monkeypatch):
+    cache = TranscriptCache(tmp_path)
+    cache.put("key", "text")
+
+    # Evict the entry between the read and the refresh of its modification time
+    read_text = type(tmp_path).read_text
+
+    def read_then_evict(path, *args, **kwargs):
+        text = read_text(path, *args, **kwargs)
+        path.unlink()
+        return text
+
+    monkeypatch.setattr(type(tmp_path), "read_text", read_then_evict)
+
+    assert cache.get("key") == "text"
+    assert not (tmp_path / "key.json").exists()
+
+
+def test_failed_store_is_not_raised(tmp_path):
+    cache = TranscriptCache(tmp_path / "file")
+    (tmp_path / "file").write_text("not a directory")
+
+    asyncio.run(cache.store("key", "text"))
@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import glob
+import os
+import uuid
+from typing import List, Optional
+
+import numpy as np
+from numba import njit, prange
+
+# Whisper works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Longest segment sent to Whisper in a single request (the HF endpoint handles ~30 s per call)
+MAX_CHUNK_SECONDS = 30.0
+
+# Shortest chunk worth its own Whisper request, shorter leftovers are folded into the previous chunk
+MIN_CHUNK_SECONDS = 1.0
+
+# RMS level (relative to int16 full scale) below which a 20 ms frame counts as silence
+SILENCE_THRESHOLD = 0.01
+
+FRAME_SECONDS = 0.02
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def split_on_silence(
+    pcm: np.ndarray,
+    sr: int,
+    thresh: float,
+    max_chunk_s: float = MAX_CHUNK_SECONDS,
+    min_chunk_s: float = MIN_CHUNK_SECONDS,
+) -> np.ndarray:
+    """
+    Computes chunk boundaries (sample offsets, starting at 0 and ending at len(pcm)) for an int16
+    PCM waveform, so no chunk is longer than `max_chunk_s`. Each chunk is cut at the last silent
+    20 ms frame before the limit, or at the limit itself when there is no silence. Silence carried
+    over from the previous cut is never used as a cut, and a last chunk shorter than
+    `min_chunk_s` is folded into the previous one, so there are no near-empty chunks.
+    """
+    frame_length = max(1, int(sr * FRAME_SECONDS))
+    n_frames = pcm.shape[0] // frame_length
+    max_frames = max(1, int(max_chunk_s / FRAME_SECONDS))
+
+    # RMS of every non-overlapping frame, computed in parallel
+    rms = np.empty(n_frames, dtype=np.float32)
+    for i in prange(n_frames):
+        start = i * frame_length
+        acc = 0.0
+        for j in range(start, start + frame_length):
+            sample = pcm[j] / 32768.0
+            acc += sample * sample
+        rms[i] = np.sqrt(acc / frame_length)
+
+    boundaries = [0]
+    start = 0
+    while n_frames - start > max_frames:
+        # Skip the silent run the chunk starts in, a cut inside it would end the chunk right away
+        first_voiced = start
+        while first_voiced < n_frames and rms[first_voiced] < thresh:
+            first_voiced += 1
+
+        cut = start + max_frames
+        for frame in range(start + max_frames - 1, first_voiced, -1):
+            if rms[frame] < thresh:
+                cut = frame
+                break
+        boundaries.append(cut * frame_length)
+        start = cut
+
+    # The previous chunk may exceed the limit by less than `min_chunk_s`
+    if len(boundaries) > 1 and pcm.shape[0] - boundaries[-1] < min_chunk_s * sr:
+        boundaries.pop()
+    boundaries.append(pcm.shape[0])
+
+    return np.array(boundaries, dtype=np.int64)
+
+
+async def _run_ffmpeg(*args: str, stdin: Optional[bytes] = None) -> bytes:
+    """
+    Runs ffmpeg or ffprobe (already required by yt_dlp) and returns its output, errors are raised.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(stdin)
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"{args[0]} failed: {stderr.decode(errors='ignore').strip()}"
+        )
+
+    return stdout
+
+
+async def probe_duration(audio_file: str) -> float:
+    """
+    Reads the duration of an audio file in seconds from its container, without decoding it.
+    """
+    output = await _run_ffmpeg(
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        audio_file,
+    )
+    return float(output)
+
+
+async def decode_pcm(audio_file: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes an audio file into a mono int16 PCM waveform.
+    """
+    output = await _run_ffmpeg(
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        audio_file,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "-",
+    )
+    return np.frombuffer(output, dtype=np.int16)
+
+
+async def encode_chunks(
+    pcm: np.ndarray, sr: int, boundaries: np.ndarray, prefix: str
+) -> List[str]:
+    """
+    Encodes a PCM waveform into FLAC chunks cut at the given boundaries with ffmpeg's segment
+    muxer, about half the size of WAV chunks to upload. Returns the chunk files in order.
+    """
+    segment_times = ",".join(str(boundary / sr) for boundary in boundaries[1:-1])
+    await _run_ffmpeg(
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "-i",
+        "-",
+        "-c:a",
+        "flac",
+        "-f",
+        "segment",
+        "-segment_times",
+        segment_times,
+        "-reset_timestamps",
+        "1",
+        f"{prefix}-chunk%04d.flac",
+        stdin=pcm.tobytes(),
+    )
+    return sorted(glob.glob(f"{glob.escape(prefix)}-chunk*.flac"))
+
+
+async def chunk_audio(
+    audio_file: str, max_chunk_s: float = MAX_CHUNK_SECONDS
+) -> List[str]:
+    """
+    Splits a long audio file on silences into FLAC chunks of at most `max_chunk_s` seconds, written
+    next to the original file under a name unique to this call. Returns [audio_file] unchanged
+    when it is short enough.
+    """
+    # Audio that cannot be probed or decoded locally is left to Whisper as a single request
+    try:
+        # Most videos are short enough, only probe them instead of decoding them
+        if await probe_duration(audio_file) <= max_chunk_s:
+            return [audio_file]
+
+        pcm = await decode_pcm(audio_file)
+    except (OSError, RuntimeError, ValueError):
+        return [audio_file]
+
+    boundaries = await asyncio.to_thread(
+        split_on_silence, pcm, SAMPLE_RATE, SILENCE_THRESHOLD, max_chunk_s
+    )
+    if len(boundaries) <= 2:
+        return [audio_file]
+
+    # Concurrent transcriptions of the same file must not write or remove each other's chunks
+    prefix = f"{os.path.splitext(audio_file)[0]}-{uuid.uuid4().hex}"
+    try:
+        return await encode_chunks(pcm, SAMPLE_RATE, boundaries, prefix)
+    except (OSError, RuntimeError):
+        # Whatever chunks were written before the failure are removed
+        for chunk_file in glob.glob(f"{glob.escape(prefix)}-chunk*.flac"):
+            with contextlib.suppress(OSError):
+                os.remove(chunk_file)
+        return [audio_file]
@@ -1,6 +1,11 @@
 from typing import List
 import json
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
 
 async def json_response_formatter(
     summaries: List[str],
@@ -10,20 +15,43 @@ async def json_response_formatter(
 ) -> str:
     """Provides a JSON-formatted response with the summaries, titles, topics, URLs for all videos the user asked for."""
     # Ensure all lists have the same length
-    if not (len(summaries) == len(titles) == len(urls) == len(topics)):
+    if len({len(summaries), len(titles), len(urls), len(topics)}) != 1:
         return "Error: Input lists must have the same length."
 
-    formatted_response = []
-
     formatted_response = [
         {
-            "video_title": titles[i],
-            "url": urls[i],
-            "topic": topics[i],
-            "summary": summaries[i],
+            "video_title": title,
+            "url": url,
+            "topic": topic,
+            "summary": summary,
         }
-        for i in range(len(summaries))
+        for title, url, topic, summary in zip(titles, urls, topics, summaries)
     ]
 
     # Convert the list to a JSON string
+    if orjson is not None:
+        return orjson.dumps(
+            {"Youtube Videos": formatted_response}, option=orjson.OPT_INDENT_2
+        ).decode()
+
     return json.dumps({"Youtube Videos": formatted_response}, indent=2)
+
+
+async def text_response_formatter(
+    summaries: List[str],
+    titles: List[str],
+    topics: List[str],
+    urls: List[str],
+) -> str:
+    """Provides a multi-line formatted response with the summaries, titles, topics, URLs for all videos the user asked for."""
+    # Ensure all lists have the same length
+    if len({len(summaries), len(titles), len(urls), len(topics)}) != 1:
+        return "Error: Input lists must have the same length."
+
+    # Build the whole layout in a single pass, with a blank line between videos
+    return "\n\n".join(
+        f"Video {i + 1}:\n  Title: {title}\n  URL: {url}\n  Topic: {topic}\n  Summary: {summary}"
+        for i, (title, url, topic, summary) in enumerate(
+            zip(titles, urls, topics, summaries)
+        )
+    )
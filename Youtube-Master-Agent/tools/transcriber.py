@@ -1,42 +1,398 @@
 import aiohttp
+import asyncio
+import contextlib
+import mimetypes
 import os
-import dotenv
+import ijson
+import functools
+import weakref
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from config import HF_TOKEN
+from tools.audio_chunker import chunk_audio
+from tools.transcript_cache import TranscriptCache
 
-dotenv.load_dotenv()
+_HEADERS = {"Authorization": f"Bearer {HF_TOKEN}"}
 
 # Endpoint url for Whisper (STT model) from HuggingFaceInferenceAPI
 WHISPER_HF_API_URL = (
     "https://api-inference.huggingface.co/models/openai/whisper-large-v3"
 )
 
+# Optional Whisper endpoint (e.g. a dedicated HF Inference Endpoint) that accepts several
+# audio files in one multipart request and replies with a list of transcriptions
+WHISPER_HF_BATCH_API_URL = os.getenv("WHISPER_HF_BATCH_API_URL")
+
+# Maximum number of audio files sent in a single batched request
+DEFAULT_MAX_BATCH = 8
+
+# Whisper requests in flight at once per HTTP session, so long videos do not flood the endpoint
+MAX_CONCURRENT_REQUESTS = 8
+
+# Transient errors (rate limiting, server errors, dropped connections and timeouts) are retried
+# with exponential backoff, any other error fails the request
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Size of the chunks read when draining a Whisper response
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Audio containers accepted for transcription, YouTube audio is kept in its native codec
+SUPPORTED_AUDIO_EXTENSIONS = (
+    ".mp3",
+    ".m4a",
+    ".opus",
+    ".ogg",
+    ".webm",
+    ".wav",
+    ".flac",
+    ".aac",
+)
+
+# Returned in place of a transcription for files in any other format
+UNSUPPORTED_FORMAT_MESSAGE = (
+    "Unsupported audio format for {audio_file}. Supported formats: "
+    + ", ".join(SUPPORTED_AUDIO_EXTENSIONS)
+)
+
+# Returned in place of a transcription when Whisper does not return any text
+TRANSCRIPTION_FAILED_MESSAGE = "Transcription failed for {audio_file}. Either no word was detected or there is something wrong with the audio file."
+
+# Returned in place of a transcription when transcribing a file raised an error
+TRANSCRIPTION_ERROR_MESSAGE = "Transcription failed for {audio_file}: {error}"
+
+# Stands in for the chunks of a long audio file that could not be transcribed
+UNTRANSCRIBED_CHUNK_MARKER = "[untranscribed audio]"
+
+# Transcriptions are cached on disk, keyed by the audio content
+TRANSCRIPT_CACHE = TranscriptCache()
+
+T = TypeVar("T")
+
+# Sends the chunks of an audio file to Whisper, returning one transcription (or None) per chunk
+ChunkPoster = Callable[[List[str]], Awaitable[List[Optional[str]]]]
+
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    Creates an aiohttp session authenticated against the Hugging Face Inference API.
+    Connections are kept alive and DNS lookups cached, so a long-lived session only pays
+    the TCP/TLS handshake once. Must be called from within a running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, headers=_HEADERS)
+
+
+async def transcribe_audio(
+    audio_file: str, session: Optional[aiohttp.ClientSession] = None
+) -> str:
+    """
+    Asynchronously transcribes an audio file into text using the Hugging Face Inference API.
+    """
+    return (await transcribe_audio_batch([audio_file], session))[0]
+
 
-async def transcribe_audio(audio_file: str) -> str:
+async def _transcribe_file(audio_file: str, post_chunks: ChunkPoster) -> str:
     """
-    Asynchronously transcribes an MP3 audio file into text using the Hugging Face Inference API.
+    Transcribes an audio file, returning the transcription text or an error message. Transcriptions
+    are served from the cache when possible, otherwise long audio is split on silences and its
+    chunks are sent to Whisper with `post_chunks`.
     """
-    # Load HF token
-    HF_TOKEN = os.getenv("HF_API_KEY")
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
+    # Verify the audio file is in a format Whisper can decode
+    if not audio_file.lower().endswith(SUPPORTED_AUDIO_EXTENSIONS):
+        return UNSUPPORTED_FORMAT_MESSAGE.format(audio_file=audio_file)
 
-    # Verify audio file ends with .mp3 and remove duplicate '.mp3'
-    if not audio_file.endswith(".mp3"):
-        return "Audio file must be in MP3 format."
+    key, text = await TRANSCRIPT_CACHE.lookup(audio_file)
+    if text is not None:
+        return text
 
-    # Using aiohttp for non-blocking HTTP requests
-    async with aiohttp.ClientSession() as session:
-        with open(audio_file, "rb") as f:
-            audio_data = f.read()
+    chunk_files = await chunk_audio(audio_file)
+    try:
+        texts = await post_chunks(chunk_files)
+    finally:
+        _remove_chunks(audio_file, chunk_files)
 
-        # Send the audio file for transcription
-        async with session.post(
-            WHISPER_HF_API_URL, headers=headers, data=audio_data
-        ) as response:
-            result = await response.json()
+    text, complete = _join_chunks(texts)
+    if text is None:
+        return TRANSCRIPTION_FAILED_MESSAGE.format(audio_file=audio_file)
 
-    # Return transcription text or error message
-    result = result.get(
-        "text",
-        "Transcription failed for {audio_file}. Either no word was detected or there is something wrong with the audio file.",
+    # Partial transcriptions are not cached, so their failed chunks are retried next time
+    if complete:
+        await TRANSCRIPT_CACHE.store(key, text)
+
+    return text
+
+
+async def _post_audio(audio_file: str, session: aiohttp.ClientSession) -> Optional[str]:
+    """
+    Sends a single audio file to Whisper, returning the transcription text or None on failure.
+    """
+    # Stream the file from disk to the socket instead of loading it fully into memory,
+    # aiohttp reads file payloads in chunks off the event loop
+    headers = {
+        "Content-Length": str(os.path.getsize(audio_file)),
+        "Content-Type": _content_type(audio_file),
+    }
+
+    async def send() -> Optional[str]:
+        with open(audio_file, "rb") as audio:
+            # Send the audio file for transcription
+            async with session.post(
+                WHISPER_HF_API_URL, headers=headers, data=audio
+            ) as response:
+                _check_retry(response)
+                return await _read_transcription(response)
+
+    return await _send_with_retries(send, session)
+
+
+class _RetryableStatus(Exception):
+    """Raised for a response that is worth retrying (rate limited or a server error)."""
+
+
+def _check_retry(response: aiohttp.ClientResponse) -> None:
+    if response.status in RETRY_STATUSES:
+        raise _RetryableStatus(response.status)
+
+
+# Limits the concurrent Whisper requests of each HTTP session (and so of each event loop)
+_request_slots = weakref.WeakKeyDictionary()
+
+
+async def _send_with_retries(
+    send: Callable[[], Awaitable[T]], session: aiohttp.ClientSession
+) -> Optional[T]:
+    """
+    Sends a Whisper request, retrying transient errors. Returns None when the request failed,
+    so one failed request never fails the other files or chunks sent alongside it.
+    """
+    slots = _request_slots.get(session)
+    if slots is None:
+        slots = _request_slots[session] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with slots:
+                return await send()
+        except (_RetryableStatus, *RETRY_EXCEPTIONS):
+            if attempt == MAX_RETRIES:
+                return None
+        except aiohttp.ClientError:
+            return None
+
+        await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+
+
+async def _read_transcription(response: aiohttp.ClientResponse) -> Optional[str]:
+    """
+    Incrementally parses a Whisper response and returns its text as soon as it is read,
+    without buffering the whole body (e.g. timestamp chunks) or decoding it twice.
+    """
+    text = None
+    try:
+        async for text in ijson.items(response.content, "text"):
+            break
+    except ijson.JSONError:
+        # Error pages are not JSON
+        pass
+
+    # Drain the rest of the body so the connection can be reused
+    async for _ in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+        pass
+
+    return text
+
+
+async def _post_chunks(
+    chunk_files: List[str], session: aiohttp.ClientSession
+) -> List[Optional[str]]:
+    """
+    Transcribes audio chunks with one concurrent request per chunk.
+    """
+    return list(
+        await asyncio.gather(
+            *(_post_audio(chunk_file, session) for chunk_file in chunk_files)
+        )
+    )
+
+
+def _join_chunks(texts: List[Optional[str]]) -> Tuple[Optional[str], bool]:
+    """
+    Joins the transcriptions of an audio file's chunks, marking the chunks that failed. Returns
+    None when every chunk failed, and whether every chunk succeeded (only then is it cached).
+    """
+    if all(text is None for text in texts):
+        return None, False
+
+    text = " ".join(
+        UNTRANSCRIBED_CHUNK_MARKER if text is None else text.strip() for text in texts
+    )
+    return text, None not in texts
+
+
+def _remove_chunks(audio_file: str, chunk_files: List[str]) -> None:
+    for chunk_file in chunk_files:
+        if chunk_file != audio_file:
+            with contextlib.suppress(OSError):
+                os.remove(chunk_file)
+
+
+def _content_type(audio_file: str) -> str:
+    return mimetypes.guess_type(audio_file)[0] or "application/octet-stream"
+
+
+async def transcribe_audio_batch(
+    audio_files: List[str],
+    session: Optional[aiohttp.ClientSession] = None,
+    max_batch: int = DEFAULT_MAX_BATCH,
+) -> List[str]:
+    """
+    Transcribes a list of audio files, returning the transcriptions in input order.
+    Chunks are sent in multipart batches of up to `max_batch`, shared by all files, when
+    WHISPER_HF_BATCH_API_URL is set, otherwise one request per chunk is sent concurrently.
+    """
+    if session is None:
+        async with create_session() as session:
+            return await transcribe_audio_batch(audio_files, session, max_batch)
+
+    # Each request is network bound, so overlap them instead of paying the latencies in sequence
+    if not WHISPER_HF_BATCH_API_URL:
+        post_chunks = functools.partial(_post_chunks, session=session)
+        senders = [contextlib.nullcontext(post_chunks) for _ in audio_files]
+    else:
+        batcher = _ChunkBatcher(session, max_batch, len(audio_files))
+        senders = [batcher.sender() for _ in audio_files]
+
+    async def transcribe(
+        audio_file: str, sender: AsyncContextManager[ChunkPoster]
+    ) -> str:
+        # A missing file or a network error only fails the file it happened to
+        try:
+            async with sender as post_chunks:
+                return await _transcribe_file(audio_file, post_chunks)
+        except Exception as e:
+            return TRANSCRIPTION_ERROR_MESSAGE.format(
+                audio_file=audio_file, error=str(e) or type(e).__name__
+            )
+
+    return list(
+        await asyncio.gather(
+            *(
+                transcribe(audio_file, sender)
+                for audio_file, sender in zip(audio_files, senders)
+            )
+        )
     )
 
-    return result
+
+class _ChunkBatcher:
+    """
+    Shares multipart requests to the batch endpoint between the files of one transcription call.
+    Chunks are queued until a batch is full, or until every file has either sent its chunks or
+    finished without sending any (e.g. served from the cache), then the rest is flushed.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, max_batch: int, num_files: int):
+        self.session = session
+        self.max_batch = max_batch
+        self._waiting = num_files
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+        self._tasks = set()
+
+    @contextlib.asynccontextmanager
+    async def sender(self) -> AsyncIterator[ChunkPoster]:
+        """Yields the chunk poster of one file."""
+        sent = False
+
+        async def post_chunks(chunk_files: List[str]) -> List[Optional[str]]:
+            nonlocal sent
+            sent = True
+
+            loop = asyncio.get_running_loop()
+            futures = []
+            for chunk_file in chunk_files:
+                futures.append(loop.create_future())
+                self._queue.append((chunk_file, futures[-1]))
+                if len(self._queue) >= self.max_batch:
+                    self._flush()
+
+            self._file_done()
+            return list(await asyncio.gather(*futures))
+
+        try:
+            yield post_chunks
+        finally:
+            if not sent:
+                self._file_done()
+
+    def _file_done(self) -> None:
+        self._waiting -= 1
+        if self._waiting == 0 and self._queue:
+            self._flush()
+
+    def _flush(self) -> None:
+        batch, self._queue = self._queue, []
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            texts = await _transcribe_batch(
+                [chunk_file for chunk_file, _ in batch], self.session
+            )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), text in zip(batch, texts):
+            future.set_result(text)
+
+
+async def _transcribe_batch(
+    audio_files: List[str], session: aiohttp.ClientSession
+) -> List[Optional[str]]:
+    """
+    Sends several audio files to Whisper in one multipart request, so the endpoint can run
+    them as a single batch. Returns one transcription (or None on failure) per file.
+    """
+
+    async def send() -> List[Optional[str]]:
+        with contextlib.ExitStack() as stack:
+            form = aiohttp.FormData()
+            for audio_file in audio_files:
+                form.add_field(
+                    "inputs",
+                    stack.enter_context(open(audio_file, "rb")),
+                    filename=os.path.basename(audio_file),
+                    content_type=_content_type(audio_file),
+                )
+
+            async with session.post(WHISPER_HF_BATCH_API_URL, data=form) as response:
+                _check_retry(response)
+
+                # The endpoint replies with a list of results in input order, anything else is an error
+                try:
+                    return [
+                        item.get("text") if isinstance(item, dict) else None
+                        async for item in ijson.items(response.content, "item")
+                    ]
+                except ijson.JSONError:
+                    return []
+
+    results = await _send_with_retries(send, session)
+    if results is None or len(results) != len(audio_files):
+        return [None] * len(audio_files)
+
+    return results
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default location and size cap of the on-disk transcription cache
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "tubemaster"
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024**3
+
+
+class TranscriptCache:
+    """
+    An on-disk LRU cache of transcriptions, keyed by the SHA-256 of the audio content.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_file(audio_file: str) -> str:
+        """Computes the SHA-256 hex digest of a file without loading it fully into memory."""
+        digest = hashlib.sha256()
+        with open(audio_file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached transcription for a key, or None on a miss."""
+        path = self.cache_dir / f"{key}.json"
+        try:
+            text = json.loads(path.read_text(encoding="utf-8"))["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Refresh the modification time so eviction treats the entry as recently used,
+        # without recreating an entry evicted since it was read
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Stores a transcription and evicts the least recently used entries above the size cap."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.json"
+
+        # Write to a temporary file unique to this writer first, so readers never see a partial
+        # entry and concurrent writers of the same key do not move each other's file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                json.dump({"text": text}, tmp_file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat(), path))
+            except OSError:
+                continue
+
+        total_bytes = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= stat.st_size
+
+    async def lookup(self, audio_file: str) -> Tuple[str, Optional[str]]:
+        """Hashes an audio file off the event loop and returns its key with the cached transcription, if any."""
+        key = await asyncio.to_thread(self.hash_file, audio_file)
+
+        text = await asyncio.to_thread(self.get, key)
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return key, text
+
+    async def store(self, key: str, text: str) -> None:
+        """Stores a transcription off the event loop, a failed write only means a later cache miss."""
+        try:
+            await asyncio.to_thread(self.put, key, text)
+        except OSError as e:
+            logger.warning("Could not cache the transcription %s: %s", key, e)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the cache hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,54 @@
+import aiohttp
+import asyncio
+from typing import List, Optional, Tuple
+from tools.transcriber import create_session, transcribe_audio
+from tools.youtube_fetcher import fetch_youtube_audio
+
+
+async def fetch_and_transcribe(
+    urls: List[str], session: Optional[aiohttp.ClientSession] = None
+) -> List[str]:
+    """
+    Downloads and transcribes a list of YouTube videos. The transcription of each video starts
+    as soon as its download finishes, while the remaining downloads are still in flight.
+    Returns one result per URL, in input order.
+    """
+    if session is None:
+        async with create_session() as session:
+            return await fetch_and_transcribe(urls, session)
+
+    async def download(index: int, url: str) -> Tuple[int, Optional[str], str]:
+        try:
+            audio_file, video_title = await fetch_youtube_audio(url)
+        except Exception as e:
+            return index, None, str(e)
+        return index, audio_file, video_title
+
+    async def transcribe(
+        index: int, audio_file: str, video_title: str
+    ) -> Tuple[int, str]:
+        transcription = await transcribe_audio(audio_file, session)
+        return index, (
+            f"URL: {urls[index]}, Title: {video_title}, Transcription: {transcription}"
+        )
+
+    results: List[Optional[str]] = [None] * len(urls)
+    transcription_tasks = []
+
+    # Hand each finished download over to the transcriber without waiting for the others
+    for next_download in asyncio.as_completed(
+        [download(index, url) for index, url in enumerate(urls)]
+    ):
+        index, audio_file, video_title = await next_download
+        if audio_file is None:
+            results[index] = f"URL: {urls[index]}, Download failed: {video_title}"
+            continue
+
+        transcription_tasks.append(
+            asyncio.create_task(transcribe(index, audio_file, video_title))
+        )
+
+    for index, result in await asyncio.gather(*transcription_tasks):
+        results[index] = result
+
+    return results
@@ -1,41 +1,104 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tempfile
+import threading
+from typing import Tuple
 import uuid
 import yt_dlp
 
+# Downloaded audio is stored in the system temp directory
+_TEMP_DIR = Path(tempfile.gettempdir())
 
-async def download_youtube_audio(url: str) -> str:
+# Shared options of every download, only the output name is set per download
+_YDL_OPTS = {
+    "format": "bestaudio/best",
+    "outtmpl": str(_TEMP_DIR / "%(id)s.%(ext)s"),
+    "postprocessors": [
+        {
+            "key": "FFmpegExtractAudio",
+            # Keep the native codec (usually Opus or AAC), ffmpeg only remuxes the stream
+            "preferredcodec": "best",
+        }
+    ],
+    "quiet": True,
+}
+
+# Dedicated threads for downloads and their ffmpeg post-processing, so they neither compete
+# with nor are limited by the default executor used by the rest of the agent
+_DL_EXEC = ThreadPoolExecutor(max_workers=8, thread_name_prefix="yt-dl")
+
+# YoutubeDL instances are not thread safe, so each executor thread keeps its own
+_local = threading.local()
+
+
+def _get_ydl() -> yt_dlp.YoutubeDL:
     """
-    Downloads a YouTube video and extracts its audio as an MP3 file, storing it in a temporary directory.
-    Returns the path to the downloaded MP3 file and the title of the video.
+    Returns the YoutubeDL instance of the current thread, so its HTTP opener (and its warm
+    connections) is reused across downloads instead of being rebuilt for every video.
     """
-    temp_dir = Path(tempfile.gettempdir())  # Use system temp directory
-    audio_file_id = str(uuid.uuid4())
-    output_dir = str(temp_dir / f"{audio_file_id}")
+    ydl = getattr(_local, "ydl", None)
+    if ydl is None:
+        ydl = _local.ydl = yt_dlp.YoutubeDL(_YDL_OPTS)
+    return ydl
+
+
+def _download(url: str) -> Tuple[str, str]:
+    ydl = _get_ydl()
 
-    ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": str(output_dir),
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
-        "quiet": True,
-    }
+    # A unique name per download, so concurrent requests for the same video never share files
+    # (the instance is only used by this thread, one download at a time)
+    ydl.params["outtmpl"]["default"] = str(_TEMP_DIR / f"{uuid.uuid4()}.%(ext)s")
+    info_dict = ydl.extract_info(url)
+    video_title = info_dict.get("title", "Unknown Title")
 
+    # The final path, after the audio was extracted
+    audio_file = info_dict["requested_downloads"][0]["filepath"]
+
+    return audio_file, video_title
+
+
+def _extract_metadata(url: str) -> Tuple[str, str]:
+    # Without download the format is only selected, nothing is fetched or post-processed
+    info_dict = _get_ydl().extract_info(url, download=False)
+    return info_dict.get("title", "Unknown Title"), info_dict.get("webpage_url", url)
+
+
+async def fetch_youtube_metadata(url: str) -> Tuple[str, str]:
+    """
+    Fetches the title and the canonical URL of a YouTube video without downloading it, errors are raised.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_DL_EXEC, _extract_metadata, url)
+
+
+async def fetch_youtube_audio(url: str) -> Tuple[str, str]:
+    """
+    Downloads a YouTube video and extracts its audio in its native codec, storing it in a temporary directory.
+    Returns the path to the downloaded audio file and the title of the video, download errors are raised.
+    """
     loop = asyncio.get_running_loop()
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    return await loop.run_in_executor(_DL_EXEC, _download, url)
+
+
+async def download_youtube_audio(url: str, metadata_only: bool = False) -> str:
+    """
+    Downloads a YouTube video and extracts its audio in its native codec, storing it in a temporary directory.
+    Returns the path to the downloaded audio file and the title of the video.
+    With metadata_only=True nothing is downloaded, only the title and URL of the video are returned.
+    """
+    if metadata_only:
         try:
-            info_dict = await loop.run_in_executor(None, ydl.extract_info, url)
-            video_title = info_dict.get("title", "Unknown Title")
+            video_title, video_url = await fetch_youtube_metadata(url)
         except Exception as e:
             return str(e)
 
-    audio_file = f"{output_dir}.mp3"
+        return f"Title: {video_title}, URL: {video_url}"
+
+    try:
+        audio_file, video_title = await fetch_youtube_audio(url)
+    except Exception as e:
+        return str(e)
 
     # Pack response
     response = f"Audio file: {audio_file}, Title: {video_title}"